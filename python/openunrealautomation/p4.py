@@ -11,17 +11,29 @@ import re
 import subprocess
 import time
 from locale import atoi
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 
 class UnrealPerforceUserInfo:
-    username: str = ""
-    email: str = ""
-    display_name: str = ""
-    last_access_str: str = ""
-    valid_user: bool = False
+    # Slots, because user maps of large servers can contain a lot of users
+    __slots__ = ("username",
+                 "email",
+                 "display_name",
+                 "last_access_str",
+                 "valid_user")
+
+    username: str
+    email: str
+    display_name: str
+    last_access_str: str
+    valid_user: bool
 
     def __init__(self, p4_users_line: str) -> None:
+        self.username = ""
+        self.email = ""
+        self.display_name = ""
+        self.last_access_str = ""
+        self.valid_user = False
         matches = re.match(
             r"(?P<username>\w+) \<(?P<email>[\w\.@]+)\> \((?P<display_name>.+?)\) accessed (?P<last_access_str>\d{4}\/\d{2}\/\d{2})", p4_users_line)
         if matches:
@@ -124,9 +136,11 @@ class UnrealPerforce:
         else:
             return opened_files_str.splitlines()
 
-    def get_user_map(self) -> Dict[str, UnrealPerforceUserInfo]:
+    def get_user_map(self, max_cache_age: Optional[datetime.timedelta] = None) -> Dict[str, UnrealPerforceUserInfo]:
+        """max_cache_age: If set, the users may be read from the on-disk cache (see _get_cached_meta)"""
         result = {}
-        users_str = self._p4_get_output(["users"])
+        users_str = self._get_cached_meta(
+            "users", max_cache_age, lambda: self._p4_get_output(["users"]))
         for line in users_str.splitlines():
             user = UnrealPerforceUserInfo(line)
             if user:
@@ -145,27 +159,80 @@ class UnrealPerforce:
 
     def get_last_change(self, path: str, ignore_copies=True) -> Optional[Tuple[int, str]]:
         output = self._p4_get_output(["filelog", "-m1", "-s", path])
+        copy_source, last_change = self._parse_last_change(output)
+        if ignore_copies and copy_source:
+            # Follow the chain of copies recursively
+            return self.get_last_change(copy_source, True)
+        return last_change
 
-        if ignore_copies:
-            copy_source_match = re.search(
-                r"... copy from (?P<source>//.*#\d+)", output)
-            if copy_source_match:
-                # Follow the chain of copies recursively
-                return self.get_last_change(copy_source_match.group("source"), True)
-        match = re.search(
-            r"change (?P<changelist>\d+) .* by (?P<user>.+?)@", output)
-        if match:
-            return int(match.group("changelist")), match.group("user")
-        return None
+    def get_last_changes_bulk(self, paths: List[str], ignore_copies=True) -> Dict[str, Optional[Tuple[int, str]]]:
+        """
+        Same as get_last_change(), but runs a single filelog command for all paths instead of one command per path.
+        Results are keyed by the input paths, which should be depot paths. They are matched to the depot paths printed by p4
+        case-insensitively, because p4 prints the case stored on the server (may differ from the requested path).
+        Copies are followed with separate filelog commands, which run in parallel if there are more than a few.
+        """
+        if len(paths) == 0:
+            return {}
+        # Pass the file list via stdin (-x -) to avoid command line length limits
+        output = self._p4_get_output(
+            ["-x", "-", "filelog", "-m1", "-s"], input="\n".join(paths))
+
+        # The filelog of each file starts with a line containing only its depot path
+        lines_by_depot_path = {}
+        file_lines = None
+        for line in output.splitlines():
+            if line.startswith("//"):
+                file_lines = []
+                lines_by_depot_path[line.strip().lower()] = file_lines
+            elif file_lines is not None:
+                file_lines.append(line)
+
+        result = {}
+        copy_sources = {}
+        for path in paths:
+            lines = lines_by_depot_path.get(path.lower())
+            if lines is None:
+                # e.g. "no such file(s)" errors
+                result[path] = None
+                continue
+            copy_source, result[path] = self._parse_last_change("\n".join(lines))
+            if ignore_copies and copy_source:
+                copy_sources[path] = copy_source
+
+        if len(copy_sources) > 4:
+            from concurrent.futures import ThreadPoolExecutor
+            # The remaining lookups are independent and I/O bound (p4 server round trips)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                copy_source_changes = executor.map(
+                    lambda copy_source: self.get_last_change(copy_source, True), copy_sources.values())
+                result.update(zip(copy_sources.keys(), copy_source_changes))
+        else:
+            for path, copy_source in copy_sources.items():
+                result[path] = self.get_last_change(copy_source, True)
+        return result
 
     def get_depot_location(self, local_path: str) -> str:
+        # Not cached on disk (unlike the user map): The mapping changes with stream switches / client view edits,
+        # which can't be detected from the environment alone.
         return self._p4_get_output(["where", local_path]).split(" ")[0]
 
     def get_current_stream_changed_files_since(self, duration: datetime.timedelta) -> List[str]:
+        return list(self.iter_current_stream_changed_files_since(duration))
+
+    def iter_current_stream_changed_files_since(self, duration: datetime.timedelta) -> Iterator[str]:
+        """Same as get_current_stream_changed_files_since(), but yields the depot paths while p4 is still listing them"""
         now = datetime.datetime.now()
         start_time = now-duration
         start_time_str = start_time.strftime("%Y/%m/%d:%H:%M:%S")
-        return [line.split("#")[0] for line in self._p4_get_output(["files", f"...@{start_time_str},@now"]).splitlines()]
+        # Resolve the date to a changelist number first (single cheap depot wide lookup),
+        # because the server handles changelist ranges a lot faster than date ranges.
+        last_change_before_str = self._p4_get_output(
+            ["changes", "-m1", "-s", "submitted", f"//...@{start_time_str}"])
+        last_change_before = re.match(r"Change (?P<CL>\d+) on", last_change_before_str)
+        start_revision = f"@{int(last_change_before['CL']) + 1}" if last_change_before else f"@{start_time_str}"
+        for line in self._p4_iter_output(["files", f"...{start_revision},@now"]):
+            yield line.split("#")[0]
 
     def set_uat_env_vars(self) -> None:
         current_cl = self.get_current_cl()
@@ -186,10 +253,72 @@ class UnrealPerforce:
         subprocess.run(_args, encoding="unicode_escape",
                        check=self.check, cwd=cwd)
 
-    def _p4_get_output(self, args) -> str:
+    def _p4_get_output(self, args, input: Optional[str] = None) -> str:
+        _args = ["p4"] + args
+        cwd = os.getcwd() if self.cwd is None else self.cwd
+        return subprocess.check_output(_args, cwd=cwd, stderr=subprocess.STDOUT, bufsize=1, shell=True, universal_newlines=True, input=input)
+
+    def _p4_iter_output(self, args) -> Iterator[str]:
+        """Streaming version of _p4_get_output() that yields the output lines (without line breaks) as they are printed"""
         _args = ["p4"] + args
         cwd = os.getcwd() if self.cwd is None else self.cwd
-        return subprocess.check_output(_args, cwd=cwd, stderr=subprocess.STDOUT, bufsize=1, shell=True, universal_newlines=True)
+        with subprocess.Popen(_args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=1, shell=True, universal_newlines=True) as process:
+            for line in process.stdout:
+                yield line.rstrip("\n")
+        if process.returncode != 0:
+            # Same behavior as subprocess.check_output()
+            raise subprocess.CalledProcessError(process.returncode, _args)
+
+    @staticmethod
+    def _parse_last_change(filelog_output: str) -> Tuple[Optional[str], Optional[Tuple[int, str]]]:
+        """Parse the output of 'filelog -m1 -s' for a single file into (copy source, (changelist, user))"""
+        copy_source_match = re.search(
+            r"... copy from (?P<source>//.*#\d+)", filelog_output)
+        copy_source = copy_source_match.group("source") if copy_source_match else None
+        match = re.search(
+            r"change (?P<changelist>\d+) .* by (?P<user>.+?)@", filelog_output)
+        if match:
+            return copy_source, (int(match.group("changelist")), match.group("user"))
+        return copy_source, None
+
+    def _get_cached_meta(self, key: str, max_age: Optional[datetime.timedelta], query: Callable[[], Any]) -> Any:
+        """
+        Return the result of a query for rarely changing meta data (e.g. users) from an on-disk cache
+        if it's younger than max_age. Otherwise run the query and write the result to the cache.
+        The result must be json serializable. Cache entries are specific to the working directory and p4 environment.
+        Must not be used for client specific data (e.g. depot mappings), because stream switches etc are not part of the key.
+        """
+        if max_age is None:
+            return query()
+
+        import json
+
+        from openunrealautomation.util import ouu_temp_file
+
+        cwd = os.getcwd() if self.cwd is None else self.cwd
+        p4_env = "|".join(os.environ.get(var, "") for var in ["P4PORT", "P4USER", "P4CLIENT", "P4CONFIG"])
+        cache_key = f"{key}|{os.path.abspath(cwd)}|{p4_env}"
+        cache_path = ouu_temp_file("p4_meta_cache.json")
+        try:
+            with open(cache_path, "r", encoding="utf-8") as cache_file:
+                cache = dict(json.load(cache_file))
+        except (OSError, ValueError):
+            cache = {}
+
+        now = time.time()
+        cache_entry = cache.get(cache_key)
+        if cache_entry is not None and now - cache_entry["time"] < max_age.total_seconds():
+            return cache_entry["value"]
+
+        value = query()
+        cache[cache_key] = {"time": now, "value": value}
+        # Write to a temp file + replace, so concurrent runs never read a partially written cache
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_cache_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_cache_path, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(temp_cache_path, cache_path)
+        return value
 
     def _auto_path(self, path) -> str:
         if os.path.isdir(path):
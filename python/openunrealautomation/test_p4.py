@@ -0,0 +1,53 @@
+from openunrealautomation.p4 import UnrealPerforce
+
+_BULK_FILELOG_OUTPUT = """//depot/Proj/Content/A.uasset
+... #3 change 12 edit on 2023/01/01 by alice@ws (binary+l) 'Edit A'
+//depot/proj/Content/B.uasset
+... #2 change 15 edit on 2023/01/02 by bob@ws (binary+l) 'Edit B'
+//depot/proj/Content/Copied.uasset
+... #1 change 20 branch on 2023/01/03 by carol@ws (binary+l) 'Copy'
+... ... copy from //depot/Other/Content/Copied.uasset#4
+//depot/proj/Content/Missing.uasset - no such file(s).
+"""
+
+_COPY_SOURCE_FILELOG_OUTPUT = """//depot/Other/Content/Copied.uasset
+... #4 change 7 edit on 2022/12/01 by dave@ws (binary+l) 'Original'
+"""
+
+
+def _create_stubbed_p4() -> UnrealPerforce:
+    p4 = UnrealPerforce()
+
+    def _p4_get_output(args, input=None) -> str:
+        if args[0] == "-x":
+            return _BULK_FILELOG_OUTPUT
+        assert args[-1] == "//depot/Other/Content/Copied.uasset#4"
+        return _COPY_SOURCE_FILELOG_OUTPUT
+
+    p4._p4_get_output = _p4_get_output
+    return p4
+
+
+def test_get_last_changes_bulk() -> None:
+    paths = ["//depot/proj/Content/A.uasset",
+             "//depot/proj/Content/B.uasset",
+             "//depot/proj/Content/Copied.uasset",
+             "//depot/proj/Content/Missing.uasset"]
+    result = _create_stubbed_p4().get_last_changes_bulk(paths)
+    # Results are keyed by the input paths, even if the case printed by p4 differs
+    assert result == {
+        "//depot/proj/Content/A.uasset": (12, "alice"),
+        "//depot/proj/Content/B.uasset": (15, "bob"),
+        "//depot/proj/Content/Copied.uasset": (7, "dave"),
+        "//depot/proj/Content/Missing.uasset": None,
+    }
+
+
+def test_get_last_changes_bulk_include_copies() -> None:
+    result = _create_stubbed_p4().get_last_changes_bulk(
+        ["//depot/proj/Content/Copied.uasset"], ignore_copies=False)
+    assert result == {"//depot/proj/Content/Copied.uasset": (20, "carol")}
+
+
+def test_get_last_changes_bulk_empty() -> None:
+    assert _create_stubbed_p4().get_last_changes_bulk([]) == {}
@@ -1,4 +1,7 @@
-from openunrealautomation.version import UnrealVersion
+import pytest
+
+from openunrealautomation.core import OUAException
+from openunrealautomation.version import UnrealVersion, UnrealVersionComparison
 
 
 def _test_version_string_conversion(test_string, expected_result) -> None:
@@ -37,6 +40,14 @@ def test_version_string_conversion():
     _test_version_string_conversion("5.0.2", "5.0.2-0")
     _test_version_string_conversion("5.0", "5.0.0-0")
     _test_version_string_conversion("5", "5.0.0-0")
+    # Trailing line break is ignored (same as for the regex fallback)
+    _test_version_string_conversion("5.0.2-1+br\n", "5.0.2-1+br")
+
+
+def test_version_string_conversion_invalid():
+    for test_string in ["", "5.", "5.0.2.1", "5.0-10", "5.0.2+Branch", "5.0.2-10+", "5.0.2-x", "x.0.2", "5.0.2-1+a\nb"]:
+        with pytest.raises(OUAException):
+            UnrealVersion.create_from_string(test_string)
 
 
 def test_version_compatibilit_matching():
@@ -62,3 +73,28 @@ def test_version_compatibilit_non_matching():
     _test_version_compatibility(False, "1.2.3-10", "1.2.4-10", False)
     _test_version_compatibility(False, "1.3.3-10", "1.2.3-10", True)
     _test_version_compatibility(False, "1.2.3-10", "1.3.3-10", False)
+
+
+def test_version_ordering():
+    a = UnrealVersion.create_from_string("5.3.0-10")
+    b = UnrealVersion.create_from_string("5.3.0-11")
+    c = UnrealVersion.create_from_string("5.3.1")
+    assert a < b and a <= b and b > a and b >= a and a != b
+    assert a < c and c > b
+    # versions without changelist are not ordered by changelist
+    assert UnrealVersion.create_from_string("5.3.0") == a
+    assert UnrealVersion.create_from_string("5.3.0") <= a
+    assert UnrealVersion.create_from_string("5.3.0") >= a
+
+
+def test_version_get_newest():
+    def get_newest(version_a, version_b, licensee_a=True, licensee_b=True):
+        return UnrealVersion.get_newest(UnrealVersion.create_from_string(version_a, licensee_a),
+                                        UnrealVersion.create_from_string(version_b, licensee_b))
+
+    assert get_newest("1.2.3-10", "1.2.3-10") == UnrealVersionComparison.NEITHER
+    assert get_newest("1.2.3-11", "1.2.3-10") == UnrealVersionComparison.FIRST
+    assert get_newest("1.2.3-10", "1.2.3-11") == UnrealVersionComparison.SECOND
+    assert get_newest("1.2.3-11", "1.2.3-10", True, False) == UnrealVersionComparison.NEITHER
+    assert get_newest("1.2.4-1", "1.2.3-10") == UnrealVersionComparison.FIRST
+    assert get_newest("1.2.3-1", "1.3.0-0") == UnrealVersionComparison.SECOND
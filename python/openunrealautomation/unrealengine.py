@@ -8,7 +8,6 @@ import pathlib
 import re
 import shutil
 import subprocess
-import winreg
 from typing import Dict, Generator, List, Optional, Set, Tuple
 from xml.etree.ElementTree import ElementTree as XmlTree
 
@@ -2,17 +2,14 @@
 General utility functions (python type conversion, file system access, starting processes, etc)
 """
 
-import filecmp
-import glob
 import os
 import pathlib
-import platform
 import re
 import shutil
 import stat
 import subprocess
 import tempfile
-from typing import Any, Generator, List, MutableSet, Optional, Tuple
+from typing import Any, Dict, Generator, Iterable, List, MutableSet, Optional, Tuple
 
 from openunrealautomation.core import OUAException
 
@@ -42,25 +39,62 @@ def walk_level(top: str, topdown=True, onerror=None, followlinks=False, level=1)
     Copy of os.walk() with additional level parameter.
     @param level    How many sub-directories to traverse
     """
-    # From https://stackoverflow.com/a/234329
     top = top.rstrip(os.path.sep)
     assert os.path.isdir(top)
-    num_sep = top.count(os.path.sep)
-    for root, dirs, files in os.walk(top, topdown=topdown, onerror=onerror, followlinks=followlinks):
+    yield from _walk_level_impl(top, topdown, onerror, followlinks, level, 0)
+
+
+def _walk_level_impl(root: str, topdown, onerror, followlinks, level, depth) -> Generator[Tuple[Any, List[Any], List[Any]], Any, Any]:
+    # Built directly on os.scandir(), so directories below the level limit are never listed
+    # and the entry types returned by the directory listing can be used without extra stat() calls.
+    dirs = []
+    files = []
+    walk_dirs = set()
+    try:
+        scandir_it = os.scandir(root)
+    except OSError as error:
+        if onerror is not None:
+            onerror(error)
+        return
+
+    with scandir_it:
+        for entry in scandir_it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                files.append(entry.name)
+                continue
+            dirs.append(entry.name)
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            if followlinks or not is_symlink:
+                walk_dirs.add(entry.name)
+
+    if topdown:
+        yield root, dirs, files
+
+    if depth < level:
+        # Iterate dirs after the yield, so callers can still prune the traversal in topdown mode
+        for dirname in dirs:
+            if dirname in walk_dirs:
+                yield from _walk_level_impl(os.path.join(root, dirname), topdown, onerror, followlinks, level, depth + 1)
+
+    if not topdown:
         yield root, dirs, files
-        num_sep_this = root.count(os.path.sep)
-        if num_sep + level <= num_sep_this:
-            del dirs[:]
 
 
 def walk_parents(dir: str) -> Generator[str, None, None]:
-    """Go through all parent directories of the given dir."""
-    path = pathlib.Path(dir)
-    while True:
-        yield str(path)
-        if (path.parent == path):
-            break
-        path = path.parent
+    """Go through all parent directories of the given dir (as absolute paths)."""
+    # Plain string operations are a lot cheaper than allocating pathlib.Path objects for every level.
+    prev_path = None
+    path = os.path.abspath(dir)
+    while path != prev_path:
+        yield path
+        prev_path, path = path, os.path.dirname(path)
 
 
 def _on_rm_error(func, path, exc_info) -> None:
@@ -111,6 +145,9 @@ def mirror_files(source_root: str, target_root: str, relative_paths: MutableSet[
 
     Returns number of modified files (copies and deletions)
     """
+    import filecmp
+    import glob
+
     print(
         f"Syning {len(relative_paths)} files from {source_root} to {target_root}")
     # Scan for existing files
@@ -170,6 +207,13 @@ def mirror_files(source_root: str, target_root: str, relative_paths: MutableSet[
     return modified_files
 
 
+# (command, PATH) -> absolute executable path.
+# PATH is part of the key, so changes to the environment of the current process are still picked up.
+# Only found executables are cached (as absolute paths, because on Windows which() also searches the working directory),
+# so tools that are installed later are still found.
+_which_cache: Dict[Tuple[str, Optional[str]], str] = {}
+
+
 def which_checked(command: str, display_name: Optional[str] = None) -> str:
     """
     Get the executable path of a CLI command that is on PATH.
@@ -178,7 +222,13 @@ def which_checked(command: str, display_name: Optional[str] = None) -> str:
     Example:
     which_checked("powershell") -> "C:\\windows\\System32\\WindowsPowerShell\\v1.0\\powershell.EXE"
     """
-    exe_path = shutil.which(command)
+    cache_key = (command, os.environ.get("PATH"))
+    exe_path = _which_cache.get(cache_key)
+    if exe_path is None:
+        exe_path = shutil.which(command, path=cache_key[1])
+        if exe_path is not None:
+            exe_path = os.path.abspath(exe_path)
+            _which_cache[cache_key] = exe_path
     if exe_path is None:
         error_str = command if display_name is None else f"{command} ({display_name})"
         raise OUAException(
@@ -187,6 +237,7 @@ def which_checked(command: str, display_name: Optional[str] = None) -> str:
 
 
 def glob_latest(pathname: str) -> str:
+    import glob
     found_files = glob.glob(pathname, recursive=True)
     found_files = [os.path.normpath(file) for file in found_files]
     found_files.sort(key=os.path.getctime)
@@ -198,11 +249,25 @@ def set_system_env_var(name: str, value: str) -> None:
     Set a system wide environment variable (like PATH).
     Does not affect the current environment, but all future commands.
     """
+    import platform
     if platform.system() != "Windows":
         raise NotImplementedError(
             "set_system_env_var() is only implemented on Windows")
+    import ctypes
+    import winreg
     print(f"Setting environment variable: {name}={value}")
-    os.system(f"setx {name} {value}")
+    # Write the value directly instead of spawning setx. This is the same registry key setx writes to.
+    with winreg.OpenKey(winreg.HKEY_CURRENT_USER, "Environment", 0, winreg.KEY_SET_VALUE) as key:
+        value_type = winreg.REG_EXPAND_SZ if "%" in value else winreg.REG_SZ
+        winreg.SetValueEx(key, name, 0, value_type, value)
+
+    # Notify other processes (e.g. explorer) about the change like setx does.
+    HWND_BROADCAST = 0xFFFF
+    WM_SETTINGCHANGE = 0x1A
+    SMTO_ABORTIFHUNG = 0x0002
+    result = ctypes.c_ulong()
+    ctypes.windll.user32.SendMessageTimeoutW(
+        HWND_BROADCAST, WM_SETTINGCHANGE, 0, "Environment", SMTO_ABORTIFHUNG, 5000, ctypes.byref(result))
     return
 
 
@@ -325,6 +390,18 @@ def write_text_file(path: str, content: str) -> None:
         print("Wrote", (content.count("\n") + 1), "lines to", path)
 
 
+def write_text_lines(path: str, lines: Iterable[str]) -> None:
+    """Write lines to a text file without joining them into a single string first (e.g. for long generated lists)."""
+    pathlib.Path(path).parent.mkdir(exist_ok=True, parents=True)
+    num_lines = 0
+    with open(path, "w", encoding="utf8", buffering=1 << 20) as f:
+        for line in lines:
+            f.write(line)
+            f.write("\n")
+            num_lines += 1
+    print("Wrote", num_lines, "lines to", path)
+
+
 def ouu_temp_file(file_name: str) -> str:
     return os.path.join(tempfile.gettempdir(), "OpenUnrealAutomation", file_name)
 
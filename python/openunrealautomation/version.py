@@ -2,22 +2,51 @@
 Python implementation of Unreal Engine build versioning
 """
 
+import os
+import re
 from enum import Enum
-from functools import total_ordering
-from locale import atoi
-from re import search
-from typing import Optional
+from typing import Optional, Tuple
 
 from openunrealautomation.core import OUAException
 from openunrealautomation.descriptor import UnrealDescriptor
-from openunrealautomation.p4 import UnrealPerforce
 
+_VERSION_RE = re.compile(
+    r"^(?P<MajorVersion>\d+)(\.(?P<MinorVersion>\d+)(\.(?P<PatchVersion>\d+)(-(?P<Changelist>\d+)(\+(?P<BranchName>.+))?)?)?)?$", re.ASCII)
 
-def _try_atoi(str) -> int:
-    if not str is None:
-        return atoi(str)
-    else:
-        return 0
+
+def _try_atoi(string: Optional[str]) -> int:
+    return int(string) if string else 0
+
+
+def _split_version_string(version_string: str) -> Optional[Tuple[int, int, int, int, str]]:
+    """
+    Fast path for UnrealVersion.create_from_string() that avoids the regex engine.
+    Returns (major, minor, patch, changelist, branch) or None if the string does not
+    match the simple version grammar (callers fall back to _VERSION_RE in that case).
+    """
+    numbers, has_branch, branch_name = version_string.partition("+")
+    if not numbers.isascii():
+        # Only accept ASCII digits (same as the regex)
+        return None
+    numbers, has_changelist, changelist = numbers.partition("-")
+    components = numbers.split(".")
+    if len(components) > 3:
+        return None
+    if has_changelist and (len(components) != 3 or not changelist.isdecimal()):
+        return None
+    if has_branch and (not has_changelist or len(branch_name) == 0):
+        return None
+    if "\n" in branch_name:
+        # The regex doesn't match line breaks in the branch name (only a single trailing one via $)
+        return None
+    if not all(component.isdecimal() for component in components):
+        return None
+    components += ["0"] * (3 - len(components))
+    return (int(components[0]),
+            int(components[1]),
+            int(components[2]),
+            int(changelist) if has_changelist else 0,
+            branch_name)
 
 
 class UnrealVersionComparison(Enum):
@@ -33,13 +62,21 @@ class UnrealVersionComparison(Enum):
     SECOND = 3
 
 
-@total_ordering
 class UnrealVersion():
     """
     One unique version of the engine. Used for version / compatibility checks.
     This is a python implementation of the FEngineVersionBase C++ class.
     """
 
+    __slots__ = ("major_version",
+                 "minor_version",
+                 "patch_version",
+                 "changelist",
+                 "compatible_changelist",
+                 "is_licensee_version",
+                 "is_promoted_build",
+                 "branch_name")
+
     major_version: int
     minor_version: int
     patch_version: int
@@ -62,27 +99,31 @@ class UnrealVersion():
     @staticmethod
     def create_from_string(version_string: str, is_licensee_version: bool = False) -> 'UnrealVersion':
         version = UnrealVersion()
-        regex = r"^(?P<MajorVersion>\d+)(\.(?P<MinorVersion>\d+)(\.(?P<PatchVersion>\d+)(-(?P<Changelist>\d+)(\+(?P<BranchName>.+))?)?)?)?$"
-        match = search(regex, version_string)
-        if match is None:
-            raise OUAException(
-                f"Failed to parse UnrealVersion from string '{version_string}'")
-        version.major_version = atoi(match.group("MajorVersion"))
-        version.minor_version = _try_atoi(match.group("MinorVersion"))
-        version.patch_version = _try_atoi(match.group("PatchVersion"))
-        version.changelist = _try_atoi(match.group("Changelist"))
-        version.branch_name = match.group("BranchName")
-        if version.branch_name is None:
-            version.branch_name = ""
+        components = _split_version_string(version_string)
+        if components is None:
+            match = _VERSION_RE.match(version_string)
+            if match is None:
+                raise OUAException(
+                    f"Failed to parse UnrealVersion from string '{version_string}'")
+            components = (int(match.group("MajorVersion")),
+                          _try_atoi(match.group("MinorVersion")),
+                          _try_atoi(match.group("PatchVersion")),
+                          _try_atoi(match.group("Changelist")),
+                          match.group("BranchName") or "")
+        (version.major_version,
+         version.minor_version,
+         version.patch_version,
+         version.changelist,
+         version.branch_name) = components
         version.is_licensee_version = is_licensee_version
 
         return version
 
     def __str__(self) -> str:
-        base_version = f"{self.major_version}.{self.minor_version}.{self.patch_version}-{self.changelist}"
-        if len(self.branch_name) > 0:
-            return f"{base_version}+{self.branch_name}"
-        return base_version
+        # Not cached: Fields are regularly modified after construction (e.g. in UnrealVersionDescriptor.get_compatible()).
+        if self.branch_name:
+            return f"{self.major_version}.{self.minor_version}.{self.patch_version}-{self.changelist}+{self.branch_name}"
+        return f"{self.major_version}.{self.minor_version}.{self.patch_version}-{self.changelist}"
 
     def has_changelist(self) -> bool:
         return self.changelist > 0
@@ -90,28 +131,49 @@ class UnrealVersion():
     def is_compatible_with(self, other: 'UnrealVersion') -> bool:
         if not self.has_changelist() or not other.has_changelist():
             return True
-        newest = UnrealVersion.get_newest(self, other)
-        return newest is not UnrealVersionComparison.SECOND
+        return UnrealVersion._compare(self, other) >= 0
 
     @staticmethod
     def get_newest(first: 'UnrealVersion', second: 'UnrealVersion') -> UnrealVersionComparison:
-        if not first.major_version == second.major_version:
-            return UnrealVersionComparison.FIRST if first.major_version > second.major_version else UnrealVersionComparison.SECOND
-        if not first.minor_version == second.minor_version:
-            return UnrealVersionComparison.FIRST if first.minor_version > second.minor_version else UnrealVersionComparison.SECOND
-        if not first.patch_version == second.patch_version:
-            return UnrealVersionComparison.FIRST if first.patch_version > second.patch_version else UnrealVersionComparison.SECOND
-        if first.is_licensee_version == second.is_licensee_version and first.has_changelist() and second.has_changelist() and not first.changelist == second.changelist:
-            return UnrealVersionComparison.FIRST if first.changelist > second.changelist else UnrealVersionComparison.SECOND
+        comparison = UnrealVersion._compare(first, second)
+        if comparison > 0:
+            return UnrealVersionComparison.FIRST
+        if comparison < 0:
+            return UnrealVersionComparison.SECOND
         return UnrealVersionComparison.NEITHER
 
+    @staticmethod
+    def _compare(first: 'UnrealVersion', second: 'UnrealVersion') -> int:
+        """
+        Returns 1 if first is newer, -1 if second is newer and 0 if neither is newer.
+        Changelists are only compared if both versions have one and they are from the same (licensee or epic) server,
+        so this is not a key that could be computed per version.
+        """
+        first_version = (first.major_version, first.minor_version, first.patch_version)
+        second_version = (second.major_version, second.minor_version, second.patch_version)
+        if first_version != second_version:
+            return 1 if first_version > second_version else -1
+        if first.is_licensee_version == second.is_licensee_version and first.has_changelist() and second.has_changelist() and first.changelist != second.changelist:
+            return 1 if first.changelist > second.changelist else -1
+        return 0
+
+    # Explicit comparison operators instead of functools.total_ordering.
+    # The generated operators would call both __lt__ and __eq__ (=compare twice).
+
     def __lt__(self, other) -> bool:
-        newest = UnrealVersion.get_newest(self, other)
-        return newest == UnrealVersionComparison.SECOND
+        return UnrealVersion._compare(self, other) < 0
+
+    def __le__(self, other) -> bool:
+        return UnrealVersion._compare(self, other) <= 0
+
+    def __gt__(self, other) -> bool:
+        return UnrealVersion._compare(self, other) > 0
+
+    def __ge__(self, other) -> bool:
+        return UnrealVersion._compare(self, other) >= 0
 
     def __eq__(self, other) -> bool:
-        newest = UnrealVersion.get_newest(self, other)
-        return newest == UnrealVersionComparison.NEITHER
+        return UnrealVersion._compare(self, other) == 0
 
 
 class UnrealVersionDescriptor(UnrealDescriptor):
@@ -119,10 +181,33 @@ class UnrealVersionDescriptor(UnrealDescriptor):
     Descriptor helper to read version file (Build.version)
     """
 
+    _cached_json: Optional[dict] = None
+    _cached_mtime: float = 0.0
+
     @classmethod
     def get_extension(cls) -> str:
         return ".version"
 
+    def read(self) -> dict:
+        """
+        Read the file into a python dictionary.
+        The parsed json is cached until the modification time of the file changes.
+        """
+        try:
+            mtime = os.path.getmtime(self.file_path)
+        except OSError:
+            # Let the base implementation raise the appropriate error
+            return super().read()
+        if self._cached_json is None or self._cached_mtime != mtime:
+            self._cached_json = super().read()
+            self._cached_mtime = mtime
+        # Return a copy, so callers can modify the values before calling write()
+        return dict(self._cached_json)
+
+    def write(self, values: dict) -> None:
+        self._cached_json = None
+        super().write(values)
+
     def update_local_version(self,
                              cl: Optional[int] = None,
                              compatible_cl: Optional[int] = None,
@@ -133,6 +218,7 @@ class UnrealVersionDescriptor(UnrealDescriptor):
         """
         Update the local version file (equivalent to UpdateLocalVersion UAT script).
         """
+        from openunrealautomation.p4 import UnrealPerforce
         p4 = UnrealPerforce()
         if cl is None:
             cl = p4.get_current_cl()
@@ -163,7 +249,19 @@ class UnrealVersionDescriptor(UnrealDescriptor):
         self.write(version_json)
 
     def get_current(self) -> UnrealVersion:
+        return self._get_current_from_json(self.read())
+
+    def get_compatible(self) -> UnrealVersion:
         version_json = self.read()
+        compatible_version = self._get_current_from_json(version_json)
+        compatible_version.compatible_changelist = version_json["CompatibleChangelist"]
+        if not compatible_version.is_licensee_version:
+            # Official epic engine versions = not licensee versions must always stay compatible with patch 0
+            compatible_version.patch_version = 0
+        return compatible_version
+
+    @staticmethod
+    def _get_current_from_json(version_json: dict) -> UnrealVersion:
         current_version = UnrealVersion()
         current_version.major_version = version_json["MajorVersion"]
         current_version.minor_version = version_json["MinorVersion"]
@@ -175,12 +273,3 @@ class UnrealVersionDescriptor(UnrealDescriptor):
             version_json["IsPromotedBuild"])
         current_version.branch_name = version_json["BranchName"]
         return current_version
-
-    def get_compatible(self) -> UnrealVersion:
-        compatible_version = self.get_current()
-        version_json = self.read()
-        compatible_version.compatible_changelist = version_json["CompatibleChangelist"]
-        if not compatible_version.is_licensee_version:
-            # Official epic engine versions = not licensee versions must always stay compatible with patch 0
-            compatible_version.patch_version = 0
-        return compatible_version
@@ -15,15 +15,15 @@ TODO:
 
 import argparse
 import enum
-import glob
 import os
 import re
 import shutil
+import stat
 import tkinter as tk
 import tkinter.ttk as ttk
+from concurrent.futures import Future, ThreadPoolExecutor
 from locale import atoi
-from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 from openunrealautomation.core import OUAException
 
 from openunrealautomation.descriptor import UnrealPluginDescriptor
@@ -44,19 +44,69 @@ def set_p4(cwd) -> None:
     _p4 = UnrealPerforce(cwd=cwd, check=False)
 
 
+def has_plugin_descriptor(dir: str) -> bool:
+    """Check if a directory directly contains a uplugin file. Stops at the first match instead of listing the full directory."""
+    try:
+        with os.scandir(dir) as entries:
+            return any(entry.name.endswith(".uplugin") for entry in entries)
+    except OSError:
+        return False
+
+
+_FILE_ATTRIBUTE_DIRECTORY = 0x10
+_INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+_get_file_attributes_w = None
+
+
+def get_path_is_dir(path: str) -> Optional[bool]:
+    """
+    Check if a path is a directory (True), a file (False) or doesn't exist (None) with a single file system query.
+    On Windows this uses GetFileAttributesW directly, which skips building a full stat result like os.path.isdir() etc.
+    """
+    global _get_file_attributes_w
+    if os.name != "nt":
+        try:
+            return stat.S_ISDIR(os.stat(path).st_mode)
+        except (OSError, ValueError):
+            return None
+    if _get_file_attributes_w is None:
+        import ctypes
+        _get_file_attributes_w = ctypes.windll.kernel32.GetFileAttributesW
+        _get_file_attributes_w.argtypes = [ctypes.c_wchar_p]
+        _get_file_attributes_w.restype = ctypes.c_uint32
+    attributes = _get_file_attributes_w(path)
+    if attributes == _INVALID_FILE_ATTRIBUTES:
+        return None
+    return (attributes & _FILE_ATTRIBUTE_DIRECTORY) != 0
+
+
+# Tag for directory nodes whose children were not inserted yet
+UNPOPULATED_TAG = "unpopulated"
+
+
 class FileTreeIcons(enum.Enum):
     DIR = 0, "📁"
     FILE = 1, "📄"
     MISSING = 2, "💔"
 
-    def __str__(self) -> str:
-        return self.value[1]
+    def __init__(self, id: int, icon: str) -> None:
+        # Store the value components as plain attributes, because str() is called for every inserted node
+        # and Enum.value is a lot slower than a regular attribute lookup.
+        self._icon = icon
 
-    def get_by_path(path: str) -> str:
-        if not os.path.exists(path):
-            return str(FileTreeIcons.MISSING)
-        if os.path.isdir(path):
-            return PathType.get_by_path(path).get_icon()
+    def __str__(self) -> str:
+        return self._icon
+
+    def get_by_path(path: str, is_dir: Optional[bool] = None, path_type: Optional["PathType"] = None) -> str:
+        """is_dir and path_type may be passed if already known to skip the file system checks."""
+        if is_dir is None:
+            is_dir = get_path_is_dir(path)
+            if is_dir is None:
+                return str(FileTreeIcons.MISSING)
+        if is_dir:
+            if path_type is None:
+                path_type = PathType.get_by_path(path, is_dir=True)
+            return path_type.get_icon()
         else:
             return SourceFileType.get_by_path(path).get_icon()
 
@@ -75,41 +125,53 @@ class PathType(enum.Enum):
     FILE = 100, "file", "#ffd", "📄"
 
     @staticmethod
-    def get_by_path(path: str) -> "PathType":
-        if os.path.isfile(path):
+    def get_by_path(path: str, is_dir: Optional[bool] = None) -> "PathType":
+        """is_dir may be passed if already known to skip the file system check."""
+        # Missing paths are not files (same as os.path.isfile)
+        is_file = get_path_is_dir(path) is False if is_dir is None else not is_dir
+        if is_file:
             return PathType.FILE
-        if Path(path).name == "Source":
+        # Plain string operations instead of pathlib.Path objects. All paths in the browser are normalized.
+        parent_dir, _, name = path.rpartition(os.sep)
+        if name == "Source":
             return PathType.SOURCE
         elif "\\Source\\" in path:
             # module or source_sub
-            if Path(path).parent.name == "Source":
+            if parent_dir.endswith("\\Source"):
                 return PathType.MODULE
             else:
                 return PathType.SOURCE_SUB
         elif "\\Plugins\\" in path:
             # plugin or plugin org dir
-            if glob.glob(path + "\\*.uplugin"):
+            if has_plugin_descriptor(path):
                 return PathType.PLUGIN
             else:
                 return PathType.PLUGIN_ORG
-        elif Path(path).name == "Script":
+        elif name == "Script":
             return PathType.ANGELSCRIPT_ROOT
         elif "\\Script\\" in path:
             return PathType.ANGELSCRIPT_SUB
         # TODO find a better way to determine root paths that ALSO does not rely on the file browser itself
         return PathType.ROOT
 
+    def __init__(self, id: int, tag: str, color: str, icon: str) -> None:
+        # See FileTreeIcons.__init__()
+        self._id = id
+        self._tag = tag
+        self._color = color
+        self._icon = icon
+
     def __int__(self) -> int:
-        return self.value[0]
+        return self._id
 
     def __str__(self) -> str:
-        return self.value[1]
+        return self._tag
 
     def get_color(self) -> str:
-        return self.value[2]
+        return self._color
 
     def get_icon(self) -> str:
-        return self.value[3]
+        return self._icon
 
     @staticmethod
     def configure_tags(tree: ttk.Treeview) -> None:
@@ -117,20 +179,34 @@ class PathType(enum.Enum):
             tree.tag_configure(str(case), background=case.get_color())
 
 
+class NodeInfo(object):
+    """Path information of a file browser node that is computed once when the node is registered."""
+
+    __slots__ = ("path", "name", "parent", "path_type", "is_file")
+
+    def __init__(self, path: str, path_type: PathType) -> None:
+        self.path = path
+        self.name = os.path.basename(path)
+        self.parent = os.path.dirname(path)
+        self.path_type = path_type
+        self.is_file = path_type == PathType.FILE
+
+
 class PathAttributes(object):
     @staticmethod
-    def is_movable(path: str) -> bool:
+    def is_movable(path: str, path_type: Optional[PathType] = None) -> bool:
         if path is None:
             return False
+        if path_type is None:
+            path_type = PathType.get_by_path(path)
         # Only allow moving files and folders inside the source folders
-        if os.path.isfile(path):
+        if path_type == PathType.FILE:
             file_type = SourceFileType.get_by_path(path)
             immovable_file_types = (
                 SourceFileType.PLUGIN,
                 SourceFileType.PROJECT
             )
             return file_type not in immovable_file_types
-        path_type = PathType.get_by_path(path)
         if path_type == PathType.SOURCE_SUB or path_type == PathType.MODULE:
             return True
         return False
@@ -149,25 +225,30 @@ class SourceFileType(enum.Enum):
     TEXT = 50, "txt", "📄"
     OTHER = TEXT
 
+    def __init__(self, id: int, extension: str, icon: str) -> None:
+        # See FileTreeIcons.__init__()
+        self._extension = extension
+        self._icon = icon
+
     def __str__(self) -> str:
-        return self.value[1]
+        return self._extension
 
     @staticmethod
     def from_string(string: str) -> "SourceFileType":
         for file_type in SourceFileType:
-            if file_type.value[1] == string:
+            if file_type._extension == string:
                 return file_type
         return SourceFileType.OTHER
 
     @staticmethod
     def get_by_path(path: str):
         for file_type in SourceFileType:
-            if path.endswith(str(file_type)):
+            if path.endswith(file_type._extension):
                 return file_type
         return SourceFileType.OTHER
 
     def get_icon(self) -> str:
-        return self.value[2]
+        return self._icon
 
     def get_sibling_path(self, path: str) -> str:
         def get_scope_and_ext(public: bool) -> Tuple[str, str]:
@@ -195,11 +276,12 @@ class SourceFileType(enum.Enum):
 
 
 def is_parent(tv: ttk.Treeview, suspected_parent: str, suspected_child: str) -> bool:
-    for child in tv.get_children(suspected_parent):
-        if child == suspected_child:
-            return True
-        elif is_parent(tv, child, suspected_child):
+    # Walk up from the child instead of searching the whole subtree of the parent
+    node = tv.parent(suspected_child)
+    while node:
+        if node == suspected_parent:
             return True
+        node = tv.parent(node)
     return False
 
 
@@ -313,20 +395,24 @@ class Selection_DragDrop(object):
         self.tooltip = None
         self.tooltip_label = None
         self.ctrl_down = False
+        # Latest motion event data (widget, y, x_root, y_root) that was not processed yet
+        self._pending_move = None
+        self._move_scheduled = False
+        # Screen position (x_root, y_root) of the last tooltip geometry update
+        self._last_tooltip_pos = None
         pass
 
     def is_movable(self, node: str) -> bool:
-        node_path = self.file_browser.get_node_path(node)
-        return PathAttributes.is_movable(node_path)
+        return self.file_browser.is_node_movable(node)
 
     def is_multiselectable(self, node: str) -> bool:
-        node_path = self.file_browser.get_node_path(node)
-        if node_path is None:
+        node_info = self.file_browser.node_info.get(node)
+        if node_info is None:
             return
 
         # only allow files from the same folder if you want to add it to the multi-selection
         selection = self.tree.selection()
-        if len(selection) > 0 and not Path(node_path).parent == Path(self.file_browser.get_node_path(selection[0])).parent:
+        if len(selection) > 0 and not node_info.parent == self.file_browser.node_info[selection[0]].parent:
             return False
         return True
 
@@ -348,10 +434,16 @@ class Selection_DragDrop(object):
 
     def handle_mouse_up(self, event: tk.Event) -> None:
         tv: ttk.Treeview = event.widget
+        if self._pending_move is not None:
+            # Drop the motion that was not processed yet, the release position is more accurate anyways
+            self._pending_move = None
+            self.moveto_row = tv.identify_row(event.y)
+
         if not self.tooltip is None:
             self.tooltip.destroy()
             self.tooltip = None
             self.tooltip_label = None
+            self._last_tooltip_pos = None
 
         if self.moveto_row is None:
             return
@@ -363,28 +455,47 @@ class Selection_DragDrop(object):
         self.handle_mouse_up(event)
 
     def handle_mouse_move(self, event: tk.Event) -> None:
-        tv: ttk.Treeview = event.widget
-        self.moveto_row = tv.identify_row(event.y)
-
-        selection = tv.selection()
-        immovable_item = next(
-            (item for item in selection if self.is_movable(item) == False), None)
-
-        if immovable_item is None:
-            text = Path(self.file_browser.get_node_path(selection[0])).name if len(
-                selection) == 1 else f"{len(selection)} items"
-        else:
-            text = f"🚫 can't move {Path(self.file_browser.get_node_path(immovable_item)).name} 🚫"
+        # Motion events fire a lot more often than we need to update the drag state.
+        # Only remember the latest event and process it at most once per frame (~60Hz).
+        self._pending_move = (event.widget, event.y, event.x_root, event.y_root)
+        if not self._move_scheduled:
+            self._move_scheduled = True
+            self.tree.after(16, self._flush_mouse_move)
+
+    def _flush_mouse_move(self) -> None:
+        self._move_scheduled = False
+        if self._pending_move is None:
+            return
+        tv, y, x_root, y_root = self._pending_move
+        self._pending_move = None
+        row = tv.identify_row(y)
+        if self.tooltip is not None and row == self.moveto_row:
+            # Skip the geometry update for sub-pixel / 1px jitter while hovering the same row
+            last_x, last_y = self._last_tooltip_pos
+            if abs(x_root - last_x) < 2 and abs(y_root - last_y) < 2:
+                return
+        self.moveto_row = row
+        self._last_tooltip_pos = (x_root, y_root)
 
-        geometry_str = str(TtkGeometry(0, 0, event.x_root+15, event.y_root+10))
+        geometry_str = str(TtkGeometry(0, 0, x_root+15, y_root+10))
         if self.tooltip is None:
+            # The selection can't change while dragging, so the text only needs to be determined once per drag
+            selection = tv.selection()
+            immovable_item = next(
+                (item for item in selection if self.is_movable(item) == False), None)
+
+            if immovable_item is None:
+                text = self.file_browser.node_info[selection[0]].name if len(
+                    selection) == 1 else f"{len(selection)} items"
+            else:
+                text = f"🚫 can't move {self.file_browser.node_info[immovable_item].name} 🚫"
+
             self.tooltip = tk.Toplevel()
             self.tooltip.overrideredirect(True)
             self.tooltip.geometry(geometry_str)
             self.tooltip_label = tk.Label(self.tooltip, text=text)
             self.tooltip_label.pack()
         else:
-            self.tooltip_label.config(text=text)
             self.tooltip.geometry(geometry_str)
 
     def try_move_file(self, tree: ttk.Treeview) -> None:
@@ -507,9 +618,10 @@ class NewFolderDialog(NamePathElementDialog_Base):
     def submit_impl(self, folder_name: str, full_path: str) -> None:
         if not os.path.exists(full_path):
             os.makedirs(full_path)
+            self.file_browser.evict_source_caches(full_path)
             # create node
             parent_node = self.file_browser.nodes_by_path[self.dir]
-            self.file_browser.insert_node(parent_node, folder_name, full_path)
+            self.file_browser.insert_node(parent_node, folder_name, full_path, is_dir=True)
 
 
 class RenamePathElementDialog(NamePathElementDialog_Base):
@@ -530,8 +642,8 @@ class RenamePathElementDialog(NamePathElementDialog_Base):
         get_p4().reconcile(full_path)
 
         # Update node
-        node = self.file_browser.nodes_by_path.pop(self.old_path)
-        self.file_browser.register_node(full_path, node)
+        node = self.file_browser.nodes_by_path[self.old_path]
+        self.file_browser.remap_node_path(node, full_path)
         self.file_browser.tree.item(node, text=filename)
 
 
@@ -540,8 +652,28 @@ class FileBrowser(object):
 
     def __init__(self, root: tk.Tk, ue: UnrealEngine) -> None:
         self.paths_by_node = dict()
+        self.node_info: Dict[str, NodeInfo] = dict()
         self.root_paths = set()
         self.nodes_by_path = dict()
+        # PathType only changes with file operations, so we can cache it between user actions
+        self._path_type_cache: Dict[str, PathType] = dict()
+        # Source folder paths that are known to not exist, so repeated expansions don't stat them again.
+        # Only file operations of the browser itself (or refresh_roots) invalidate this.
+        self._missing_source_paths: Set[str] = set()
+        # Directory -> whether it contains a Source folder directly or in one of its sub-directories.
+        # Filled lazily when directories are scanned and invalidated alongside _missing_source_paths.
+        self._has_source: Dict[str, bool] = dict()
+        # Worker for slow file operations (moves on network drives, p4 calls), so they don't block the UI.
+        # Single worker, so the operations are still executed in order.
+        self._file_op_executor = ThreadPoolExecutor(max_workers=1)
+        # Source and target paths of moves that are still running on the worker
+        self._moving_paths: Set[str] = set()
+        # File actions (nodes, action, description) that wait for running moves of their nodes (see defer_while_moving)
+        self._deferred_file_actions: List[Tuple[List[str], Callable[[], None], str]] = []
+        # Set in destroy(), so pending after() callbacks don't access the destroyed widgets
+        self._destroyed = False
+        # Pending chunked populations of opened nodes (see populate_node_async)
+        self._pending_populations: Dict[str, Iterator[Tuple[str, str, str, bool]]] = dict()
 
         self.root = root
         self.ue = ue
@@ -580,6 +712,9 @@ class FileBrowser(object):
         PathType.configure_tags(self.tree)
 
     def destroy(self) -> None:
+        # Already queued file operations are still completed
+        self._file_op_executor.shutdown(wait=False)
+        self._destroyed = True
         self.frame.destroy()
 
     # misc UI / util
@@ -593,35 +728,152 @@ class FileBrowser(object):
 
     # Node operations (internal)
 
-    def register_node(self, path: str, node: str) -> None:
+    def register_node(self, path: str, node: str, is_dir: Optional[bool] = None) -> None:
         self.nodes_by_path[path] = node
         self.paths_by_node[node] = path
+        self.node_info[node] = NodeInfo(path, self.path_type(path, is_dir=is_dir))
 
     def get_node_path(self, node: str) -> str:
         return self.paths_by_node.get(node, None)
 
+    def remap_node_path(self, node: str, new_path: str) -> None:
+        """
+        Update the path mappings of a node and all of its (already populated) descendants after a move/rename.
+        The tree does not mirror the directory structure 1:1 (Source folders are skipped),
+        so the descendant paths are remapped by replacing the path prefix.
+        """
+        old_path = self.node_info[node].path
+        self.evict_source_caches(old_path)
+        self.evict_source_caches(new_path)
+        stack = [node]
+        while len(stack) > 0:
+            current_node = stack.pop()
+            current_info = self.node_info.get(current_node)
+            if current_info is None:
+                # Dummy nodes of unpopulated directories don't have any mappings
+                continue
+            self.evict_path_type(current_info.path)
+            if self.nodes_by_path.get(current_info.path) == current_node:
+                del self.nodes_by_path[current_info.path]
+            # The file may not be moved yet, so pass the type explicitly instead of checking the new path
+            self.register_node(new_path + current_info.path[len(old_path):], current_node,
+                               is_dir=not current_info.is_file)
+            stack.extend(self.tree.get_children(current_node))
+
+    def path_type(self, path: str, is_dir: Optional[bool] = None) -> PathType:
+        """Cached version of PathType.get_by_path()"""
+        path_type = self._path_type_cache.get(path)
+        if path_type is None:
+            path_type = PathType.get_by_path(path, is_dir=is_dir)
+            self._path_type_cache[path] = path_type
+        return path_type
+
+    def evict_path_type(self, path: str) -> None:
+        self._path_type_cache.pop(path, None)
+
+    def has_source_dir(self, path: str) -> bool:
+        """Check if the directory contains a Source folder (with negative caching)"""
+        source_path = os.path.join(path, "Source")
+        if source_path in self._missing_source_paths:
+            return False
+        if get_path_is_dir(source_path) is True:
+            return True
+        self._missing_source_paths.add(source_path)
+        return False
+
+    def contains_source_dir(self, path: str) -> bool:
+        """Check if the directory contains a Source folder directly or in one of its immediate sub-directories (cached)"""
+        has_source = self._has_source.get(path)
+        if has_source is None:
+            has_source = self.has_source_dir(path)
+            if not has_source:
+                # Single directory scan instead of a "*\\Source\\" glob
+                try:
+                    with os.scandir(path) as entries:
+                        has_source = any(entry.is_dir() and self.has_source_dir(entry.path) for entry in entries)
+                except OSError:
+                    # Same as glob, which silently skips unreadable directories
+                    has_source = False
+            self._has_source[path] = has_source
+        return has_source
+
+    def evict_source_caches(self, path: str) -> None:
+        """
+        Evict cached Source folder information that may change if path is created/deleted/moved:
+        Everything at or below path and the two directories above it (see contains_source_dir).
+        """
+        prefix = path + os.sep
+        self._missing_source_paths = {missing_path for missing_path in self._missing_source_paths
+                                      if missing_path != path and not missing_path.startswith(prefix)}
+        self._has_source = {dir: has_source for dir, has_source in self._has_source.items()
+                            if dir != path and not dir.startswith(prefix)}
+        parent_dir = os.path.dirname(path)
+        self._has_source.pop(parent_dir, None)
+        self._has_source.pop(os.path.dirname(parent_dir), None)
+
+    def is_node_movable(self, node: str) -> bool:
+        node_info = self.node_info.get(node)
+        if node_info is None:
+            return False
+        return PathAttributes.is_movable(node_info.path, node_info.path_type)
+
+    def is_node_moving(self, node: str) -> bool:
+        """Check if the node path or one of its parent/child paths is affected by a move that is still running"""
+        path = self.get_node_path(node)
+        if path is None:
+            return False
+        for moving_path in self._moving_paths:
+            if path == moving_path or path.startswith(moving_path + os.sep) or moving_path.startswith(path + os.sep):
+                return True
+        return False
+
+    def defer_while_moving(self, nodes: List[str], action: Callable[[], None], description: str) -> bool:
+        """
+        Defer a file action on nodes until all running moves that affect them are finished.
+        Returns True if the action was deferred, so the caller must not execute it now.
+        """
+        if not any(self.is_node_moving(node) for node in nodes):
+            return False
+        self._deferred_file_actions.append((nodes, action, description))
+        self.set_status(f"{description} waits for running file moves")
+        return True
+
+    def _run_deferred_file_actions(self) -> None:
+        deferred_file_actions = self._deferred_file_actions
+        self._deferred_file_actions = []
+        for nodes, action, description in deferred_file_actions:
+            # Nodes may have been removed by a refresh in the meantime
+            if all(self.tree.exists(node) for node in nodes if node):
+                # Actions defer themselves again if there are still other moves running
+                action()
+            else:
+                self.set_status(f"{description} skipped, because the items were removed")
+
     def insert_root(self, root_path: str, name: str = None) -> None:
         normpath = os.path.normpath(root_path)
-        name = name if name is not None else Path(normpath).name
+        name = name if name is not None else os.path.basename(normpath)
 
         self.root_paths.add(normpath)
         root_node_name = ""
-        if os.path.exists(normpath):
+        is_dir = get_path_is_dir(normpath)
+        if is_dir is not None:
             node = self.insert_node(
-                root_node_name, name, normpath)
+                root_node_name, name, normpath, is_dir=is_dir)
         else:
             node = self.tree.insert(
                 "", "end",  text=f"{FileTreeIcons.MISSING} {normpath}", open=False)
         if not (node is None):
-            self.register_node(normpath, node)
-
-    def insert_node(self, parent: str, text: str, abspath: str) -> str:
-        path_type = PathType.get_by_path(abspath)
-        tags = (str(path_type),)
-        icon = FileTreeIcons.get_by_path(abspath)
+            self.register_node(normpath, node, is_dir=is_dir)
+
+    def insert_node(self, parent: str, text: str, abspath: str, is_dir: bool) -> str:
+        """is_dir must be passed by the caller (usually known from the directory listing) to skip file system checks."""
+        path_type = self.path_type(abspath, is_dir=is_dir)
+        icon = FileTreeIcons.get_by_path(abspath, is_dir=is_dir, path_type=path_type)
+        # Directories are only populated when they are opened for the first time
+        tags = (str(path_type), UNPOPULATED_TAG) if is_dir else (str(path_type),)
         extra_text = ""
         if (#SourceFileType.get_by_path(abspath) == SourceFileType.PLUGIN or
-            PathType.get_by_path(abspath) == PathType.PLUGIN):
+            path_type == PathType.PLUGIN):
             try:
                 plugin = UnrealPluginDescriptor.try_find(abspath)
                 if not plugin is None:
@@ -634,62 +886,136 @@ class FileBrowser(object):
 
         node = self.tree.insert(
             parent, "end", text=f"{icon} {text}{extra_text}", open=False, tags=tags)
-        self.register_node(abspath, node)
-        if os.path.isdir(abspath):
+        self.register_node(abspath, node, is_dir=is_dir)
+        if is_dir:
             # insert an empty dummy node so graph shows the expand icon
+            # (only until the node is populated in open_node)
             self.tree.insert(node, "end")
         return node
 
+    def set_node_populated(self, node: str, populated: bool) -> None:
+        # Tk 8.6 "tag add/remove" changes a single tag with one Tcl call,
+        # instead of reading all tags with item() and writing them back.
+        # ttk.Treeview doesn't wrap these subcommands, so call them directly.
+        self.tree.tk.call(self.tree, "tag", "remove" if populated else "add", UNPOPULATED_TAG, node)
+
+    def clear_node_children(self, node: str) -> None:
+        # Cancel a population that is still in progress, so it doesn't add outdated children
+        self._pending_populations.pop(node, None)
+        children = self.tree.get_children(node)
+        # Delete all children with a single Tcl call
+        if len(children) > 0:
+            self.tree.delete(*children)
+
     def refresh_node_children(self, node: str) -> None:
         abspath = self.get_node_path(node)
-        children = self.tree.get_children(node)
-        for child in children:
-            self.tree.delete(child)
+        self.clear_node_children(node)
         self.insert_node_path(abspath, node)
+        self.set_node_populated(node, True)
+
+    def populate_node_async(self, node: str) -> None:
+        """
+        Populate the children of a node in chunks, so the UI stays responsive while large directories are scanned.
+        Used when opening nodes. File operations still use the synchronous refresh_node_children().
+        """
+        abspath = self.get_node_path(node)
+        self.clear_node_children(node)
+        self.set_node_populated(node, True)
+        entries = self.iter_node_path_entries(abspath, node)
+        self._pending_populations[node] = entries
+        self._pump_population(node, entries)
+
+    def _pump_population(self, node: str, entries: Iterator[Tuple[str, str, str, bool]], chunk_size: int = 50) -> None:
+        if self._destroyed:
+            return
+        if self._pending_populations.get(node) is not entries:
+            # Cancelled or restarted in the meantime
+            return
+        if not self.tree.exists(node):
+            # Node was removed in the meantime
+            del self._pending_populations[node]
+            return
+        for _ in range(chunk_size):
+            try:
+                entry = next(entries, None)
+            except OSError as error:
+                # e.g. the directory was deleted/moved outside of the file browser
+                del self._pending_populations[node]
+                self.set_status(f"Failed to read {self.get_node_path(node)}: {error}")
+                # Allow opening the node again later (needs a child for the expand icon)
+                self.set_node_populated(node, False)
+                if len(self.tree.get_children(node)) == 0:
+                    self.tree.insert(node, "end")
+                return
+            if entry is None:
+                del self._pending_populations[node]
+                return
+            self.insert_node(*entry)
+        self.tree.after_idle(self._pump_population, node, entries, chunk_size)
 
     def open_node(self, event: tk.Event) -> None:
         # This implements open / double-click, so use focus instead of selection -> maybe change?
-        node = self.tree.focus()
+        self.populate_opened_node(self.tree.focus())
+
+    def populate_opened_node(self, node: str) -> None:
         path = self.get_node_path(node)
-        if path and os.path.isdir(path):
-            # Clear and refresh children for folders
-            self.refresh_node_children(node)
+        if path and self.tree.tag_has(UNPOPULATED_TAG, node):
+            # The directory may not exist yet (or only partially) while it's moved
+            if self.defer_while_moving([node], lambda: self.populate_opened_node(node), "Opening folder"):
+                return
+            # Populate folders the first time they are opened.
+            # Already populated folders are only refreshed via file operations or refresh_roots().
+            self.populate_node_async(node)
 
     def action_open_explorer(self) -> None:
         for node in self.tree.selection():
             os.startfile(self.get_node_path(node))
 
     def insert_node_path(self, path: str, parent_node: str) -> None:
+        for entry in self.iter_node_path_entries(path, parent_node):
+            self.insert_node(*entry)
+
+    def iter_node_path_entries(self, path: str, parent_node: str) -> Iterator[Tuple[str, str, str, bool]]:
+        """Yield (parent_node, element, abspath, is_dir) for all entries in path that should be inserted as nodes"""
         abspath = os.path.abspath(path)
-        for element in os.listdir(abspath):
-            nested_abspath = os.path.normpath(os.path.join(abspath, element))
-            if element == "Source":
-                # Skip the Source folder itself -> recurse
-                self.insert_node_path(nested_abspath, parent_node)
-            elif (
-                # Add paths that are inside Source folders
-                "\\Source" in nested_abspath or
-                # Add folders that contain Source folders -> HACK
-                len(glob.glob(f"{nested_abspath}\\Source\\")) > 0 or
-                len(glob.glob(f"{nested_abspath}\\*\\Source\\")) > 0 or
-                # Add uplugin files
-                element.endswith("uplugin") or
-                # Angelscript script support
-                element == "Script" or "\\Script" in nested_abspath
-            ):
-                self.insert_node(parent_node, element, nested_abspath)
+        # scandir() instead of listdir(), so we get the file types from the directory listing
+        # and don't have to stat each entry again (potentially multiple times).
+        with os.scandir(abspath) as entries:
+            for entry in entries:
+                element = entry.name
+                nested_abspath = entry.path
+                is_dir = entry.is_dir()
+                if element == "Source" and is_dir:
+                    # Skip the Source folder itself -> recurse
+                    yield from self.iter_node_path_entries(nested_abspath, parent_node)
+                elif (
+                    # Add paths that are inside Source folders
+                    "\\Source" in nested_abspath or
+                    # Add folders that contain Source folders
+                    (is_dir and self.contains_source_dir(nested_abspath)) or
+                    # Add uplugin files
+                    element.endswith("uplugin") or
+                    # Angelscript script support
+                    element == "Script" or "\\Script" in nested_abspath
+                ):
+                    yield parent_node, element, nested_abspath, is_dir
 
     # User actions
 
-    def action_delete(self) -> None:
+    def action_delete(self, nodes: Optional[List[str]] = None) -> None:
+        nodes = list(self.tree.selection()) if nodes is None else nodes
+        if self.defer_while_moving(nodes, lambda: self.action_delete(nodes), "Delete"):
+            return
         num_items_deleted = 0
-        for node in self.tree.selection():
+        for node in nodes:
             parent = self.tree.parent(node)
             if not parent:
                 self.set_status("Root elements cannot be deleted")
                 return
             abspath = self.get_node_path(node)
             if abspath:
+                self.evict_path_type(abspath)
+                self.evict_source_caches(abspath)
                 get_p4().edit(abspath)
                 if os.path.isdir(abspath):
                     shutil.rmtree(abspath)
@@ -700,15 +1026,21 @@ class FileBrowser(object):
                 num_items_deleted += 1
         self.set_status(f"Deleted {num_items_deleted} items")
 
-    def action_new_file(self) -> None:
+    def action_new_file(self, node: Optional[str] = None) -> None:
         """Open create file dialog"""
-        path = self.get_node_path(self.tree.focus())
+        node = self.tree.focus() if node is None else node
+        if self.defer_while_moving([node], lambda: self.action_new_file(node), "New file"):
+            return
+        path = self.get_node_path(node)
         if os.path.isfile(path):
-            path = str(Path(path).parent)
+            path = os.path.dirname(path)
         NewFileDialog(self.root, self, path)
 
-    def action_new_sibling_file(self) -> None:
-        path = self.get_node_path(self.tree.focus())
+    def action_new_sibling_file(self, node: Optional[str] = None) -> None:
+        node = self.tree.focus() if node is None else node
+        if self.defer_while_moving([node], lambda: self.action_new_sibling_file(node), "New sibling file"):
+            return
+        path = self.get_node_path(node)
         if os.path.isfile(path):
             file_type = SourceFileType.get_by_path(path)
             sibling_path = file_type.get_sibling_path(path)
@@ -720,32 +1052,43 @@ class FileBrowser(object):
         else:
             self.set_status("Cannot create sibling files for folders")
 
-    def action_new_folder(self) -> None:
-        path = self.get_node_path(self.tree.focus())
+    def action_new_folder(self, node: Optional[str] = None) -> None:
+        node = self.tree.focus() if node is None else node
+        if self.defer_while_moving([node], lambda: self.action_new_folder(node), "New folder"):
+            return
+        path = self.get_node_path(node)
         if os.path.isfile(path):
-            path = str(Path(path).parent)
+            path = os.path.dirname(path)
         NewFolderDialog(self.root, self, path)
 
-    def action_rename(self) -> None:
-        path = Path(self.get_node_path(self.tree.focus()))
+    def action_rename(self, node: Optional[str] = None) -> None:
+        node = self.tree.focus() if node is None else node
+        if self.defer_while_moving([node], lambda: self.action_rename(node), "Rename"):
+            return
+        path = self.get_node_path(node)
         RenamePathElementDialog(
-            self.root, self, dir=path.parent, element_name=path.name)
+            self.root, self, dir=os.path.dirname(path), element_name=os.path.basename(path))
 
     def move_paths(self, move_nodes: List[str], moveto_node: str) -> None:
-        if len(move_nodes) == 0 \
-                or moveto_node in move_nodes \
-                or moveto_node is None \
-                or moveto_node not in self.paths_by_node:
+        if len(move_nodes) == 0 or moveto_node in move_nodes:
+            return
+        if self.defer_while_moving(move_nodes + [moveto_node], lambda: self.move_paths(move_nodes, moveto_node), "Move"):
+            return
+        # Single lookup instead of a membership check + indexing
+        moveto_info = self.node_info.get(moveto_node)
+        if moveto_info is None:
             return
 
         for item in move_nodes:
-            if not PathAttributes.is_movable(item):
+            if not self.is_node_movable(item):
                 return
 
         # Use parent directory for files
-        path = self.paths_by_node[moveto_node]
-        moveto_node = moveto_node if os.path.isdir(
-            path) else self.tree.parent(moveto_node)
+        if moveto_info.is_file:
+            moveto_node = self.tree.parent(moveto_node)
+            moveto_dir = self.get_node_path(moveto_node)
+        else:
+            moveto_dir = moveto_info.path
 
         # prevent moving parent into child
         for node in move_nodes:
@@ -755,31 +1098,67 @@ class FileBrowser(object):
                 return
 
         moveto_idx = self.tree.index(moveto_node)
-        move_nodes.sort(key=lambda item: self.tree.item(item)[
-            "text"], reverse=moveto_idx < self.tree.index(move_nodes[0]))
+        # Query only the text option (one Tcl call per node that returns a single string)
+        decorated_nodes = [(self.tree.item(node, "text"), node) for node in move_nodes]
+        decorated_nodes.sort(reverse=moveto_idx < self.tree.index(move_nodes[0]))
+        move_nodes = [node for _, node in decorated_nodes]
 
-        moveto_dir = self.get_node_path(moveto_node)
         if moveto_dir in self.root_paths:
             return
 
         for node in move_nodes:
-            movefrom_path = self.get_node_path(node)
+            node_info = self.node_info[node]
+            movefrom_path = node_info.path
 
             moveto_path = os.path.normpath(os.path.join(
-                moveto_dir, Path(movefrom_path).name))
+                moveto_dir, node_info.name))
 
             # Update mappings
-            self.nodes_by_path.pop(movefrom_path)
-            self.paths_by_node[node] = moveto_path
-            self.nodes_by_path[moveto_path] = node
+            self.remap_node_path(node, moveto_path)
 
             # Move node
+            movefrom_parent = self.tree.parent(node)
+            movefrom_idx = self.tree.index(node)
             self.tree.move(node, moveto_node, moveto_idx)
 
-            # Move file
-            shutil.move(movefrom_path, moveto_path)
-            get_p4().reconcile(movefrom_path)
-            get_p4().reconcile(moveto_path)
+            # Move file in the background. The tree was already updated above and is reverted if the move fails.
+            # Other file actions on the moved paths are deferred until the move is finished.
+            self._moving_paths.add(movefrom_path)
+            self._moving_paths.add(moveto_path)
+            future = self._file_op_executor.submit(
+                FileBrowser._move_file, movefrom_path, moveto_path)
+            self._watch_move(future, node, movefrom_path, moveto_path,
+                             movefrom_parent, movefrom_idx)
+
+    @staticmethod
+    def _move_file(movefrom_path: str, moveto_path: str) -> None:
+        # Runs on the worker thread -> must not access any tk objects
+        shutil.move(movefrom_path, moveto_path)
+        get_p4().reconcile(movefrom_path)
+        get_p4().reconcile(moveto_path)
+
+    def _watch_move(self, future: Future, node: str, movefrom_path: str, moveto_path: str, movefrom_parent: str, movefrom_idx: int) -> None:
+        if self._destroyed:
+            return
+        # Poll from the tk main loop, because tk must only be accessed from the main thread
+        if not future.done():
+            self.tree.after(50, self._watch_move, future, node, movefrom_path,
+                            moveto_path, movefrom_parent, movefrom_idx)
+            return
+        self._moving_paths.discard(movefrom_path)
+        self._moving_paths.discard(moveto_path)
+
+        error = future.exception()
+        if error is not None:
+            self.set_status(f"Failed to move {movefrom_path}: {error}")
+            # Nodes may have been removed by a refresh in the meantime
+            if self.tree.exists(node):
+                # Revert mappings and node
+                self.remap_node_path(node, movefrom_path)
+                if movefrom_parent == "" or self.tree.exists(movefrom_parent):
+                    self.tree.move(node, movefrom_parent, movefrom_idx)
+
+        self._run_deferred_file_actions()
 
     # User action implementation -> file handling, etc
 
@@ -787,7 +1166,7 @@ class FileBrowser(object):
         """Actually create a file from template"""
 
         if os.path.exists(full_path):
-            self.set_status(f"File {Path(full_path).name} already exists")
+            self.set_status(f"File {os.path.basename(full_path)} already exists")
             return
 
         extension = ".".join(full_path.split(".")[1:])
@@ -823,17 +1202,23 @@ class FileBrowser(object):
         get_p4().add(full_path)
 
         # create node
-        parent_node = self.nodes_by_path[str(Path(full_path).parent)]
-        filename = Path(full_path).name
-        self.insert_node(parent_node, filename, full_path)
+        parent_node = self.nodes_by_path[os.path.dirname(full_path)]
+        filename = os.path.basename(full_path)
+        self.insert_node(parent_node, filename, full_path, is_dir=False)
         self.set_status(f"Created file {filename}")
 
     def refresh_roots(self) -> None:
+        # Files may have been changed outside of the file browser
+        self._path_type_cache.clear()
+        self._missing_source_paths.clear()
+        self._has_source.clear()
         for path in self.root_paths:
             node = self.nodes_by_path[path]
             # Easy way out: Just collapse all -> Opening will refresh automatically
             # self.refresh_node_children(node)
             self.tree.item(node, open=False)
+            if os.path.isdir(path):
+                self.set_node_populated(node, False)
 
     def async_generate_project_files_project(self):
         self.set_status("Generating project files (project)...")
@@ -8,84 +8,132 @@ Relies on OpenUnrealUtilities.
 import datetime
 import json
 import os
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 from openunrealautomation.core import OUAException, UnrealBuildConfiguration, UnrealBuildTarget
-from openunrealautomation.p4 import UnrealPerforce
+from openunrealautomation.p4 import UnrealPerforce, UnrealPerforceUserInfo
 from openunrealautomation.unrealengine import UnrealEngine
-from openunrealautomation.util import write_text_file
+from openunrealautomation.util import write_text_lines
 
+RED = "\033[1;31m"
+RESET = "\033[0m"
 
-def generate_assets_list():
-    changed_files = p4.get_current_stream_changed_files_since(
+# Mount point of the project Content directory
+GAME_MOUNT_POINT = "/Game"
+_GAME_PREFIX_LEN = len(GAME_MOUNT_POINT)
+
+
+def generate_assets_list() -> List[str]:
+    # Iterate the changed files while p4 is still listing them instead of waiting for the full list
+    changed_files = p4.iter_current_stream_changed_files_since(
         datetime.timedelta(days=4))
     disallowed_patterns = [
         "__ExternalActors__",
     ]
-    allowed_patterns = [
-        content_dir_local_path,
-        ".uasset"
-    ]
-    filtered_files = [file for file in changed_files
-                      if any(pattern in file for pattern in allowed_patterns)]
-    print(f"Found {len(filtered_files)} uassets in local Content directory")
-    filtered_files = [file for file in filtered_files if not any(
-        pattern in file for pattern in disallowed_patterns)]
+    # One precompiled alternation -> a single C-level scan per file
+    # instead of a Python generator with one substring search per pattern.
+    disallowed_re = re.compile("|".join(re.escape(pattern) for pattern in disallowed_patterns))
+    # The changed files are depot paths, so the Content directory is a prefix and the extension a suffix.
+    # The prefix is compared case-insensitively (normalized once up front), because p4 may report the depot paths
+    # of files with a different case than the Content folder mapping (case-insensitive servers).
+    content_dir_depot_prefix = (content_dir_depot_location + "/").lower()
+    content_dir_depot_prefix_len = len(content_dir_depot_prefix)
+    content_dir_depot_location_len = len(content_dir_depot_location)
+    uasset_extension_len = len(".uasset")
+    # Filter and convert to asset paths in a single pass without intermediate lists
+    num_allowed_files = 0
+    asset_paths = []
+    for file in changed_files:
+        # Cheap prefix/suffix checks first, pattern search only for the remaining files
+        if not (file.endswith(".uasset") and file[:content_dir_depot_prefix_len].lower() == content_dir_depot_prefix):
+            continue
+        num_allowed_files += 1
+        if disallowed_re.search(file):
+            continue
+        asset_paths.append(GAME_MOUNT_POINT + file[content_dir_depot_location_len:-uasset_extension_len])
+    print(f"Found {num_allowed_files} uassets in local Content directory")
     print(
-        f"Filtered down to {len(filtered_files)} uassets in local Content directory that match restricted path criteria")
+        f"Filtered down to {len(asset_paths)} uassets in local Content directory that match restricted path criteria")
 
-    asset_paths = [file.replace(content_dir_depot_location, "/Game",
-                                1).removesuffix(".uasset") for file in filtered_files]
+    write_text_lines(asset_list_path, asset_paths)
+    return asset_paths
 
-    write_text_file(asset_list_path, "\n".join(asset_paths))
+
+def build_editor():
+    ue.build(UnrealBuildTarget.EDITOR, UnrealBuildConfiguration.DEVELOPMENT)
 
 
 def run_validation():
-    ue.build(UnrealBuildTarget.EDITOR, UnrealBuildConfiguration.DEVELOPMENT)
     ue.run_commandlet("OUUValidateAssetList", arguments=[
         f"-AssetList={asset_list_path}", f"-ValidationReport={report_path}"],
         raise_on_error=False)
 
 
-def print_issues():
+@lru_cache(maxsize=None)
+def get_p4_user_map() -> Dict[str, UnrealPerforceUserInfo]:
+    # Only queried when there are errors to attribute to users
+    return p4.get_user_map(max_cache_age=p4_meta_cache_age)
+
+
+def print_issues() -> Tuple[int, int]:
+    """Print the issues of the validation report. Returns the number of errors and how many of them couldn't be attributed to a user."""
     print("Reading issues from", report_path, "...")
+    # The whole report is needed up front for the batched p4 lookup below, so it is parsed in one go.
+    # json.load already returns a dict -> no extra copy. The file is closed before the slow p4 lookups.
     with open(report_path, "r", encoding="utf-8") as report_file:
-        report = dict(json.load(report_file))
-        asset: str
-        error: str
-        if len(report) == 0:
-            print("No errors detected")
-        else:
-            print(f"{len(report)} errors detected:")
-
-        failed_to_find_user_assets = []
-        for asset, error in report.items():
-            asset_filename = asset.replace(
-                "/Game", content_dir_depot_location) + ".uasset"
-
-            first_error_line = error.splitlines()[0]
-            change_user = p4.get_last_change(
-                asset_filename, ignore_copies=True)
-
-            if change_user:
-                username = change_user[1]
-                p4_user_info = p4_user_map.get(username)
-                if p4_user_info:
-                    p4_user_info.email
-                    change_source_str = f"{username} @{change_user[0]}" if change_user else "unknown @?"
-                    RED = "\033[1;31m"
-                    print(
-                        f"{RED}ERROR: {asset_filename} by {change_source_str}:\n       {first_error_line}")
-
-                    continue
-            failed_to_find_user_assets.append(asset_filename)
-
+        report: Dict[str, str] = json.load(report_file)
+    asset: str
+    error: str
+    if len(report) == 0:
+        print("No errors detected")
+        return 0, 0
+    print(f"{len(report)} errors detected:")
+
+    # Look up the last changes of all assets with a single p4 command instead of one command per asset
+    # Swap the /Game prefix via slicing instead of str.replace().
+    # Assets from other mount points can't be mapped to depot files and are reported as is.
+    game_prefix = GAME_MOUNT_POINT + "/"
+    asset_filenames = {asset: content_dir_depot_location + asset[_GAME_PREFIX_LEN:] + ".uasset"
+                       if asset.startswith(game_prefix) else asset
+                       for asset in report.keys()}
+    changes_by_file = p4.get_last_changes_bulk(
+        [filename for filename in asset_filenames.values() if filename.startswith("//")], ignore_copies=True)
+
+    # Collect all output and write it at once instead of one print() per error
+    output_lines = []
+    failed_to_find_user_assets = []
+    for asset, error in report.items():
+        asset_filename = asset_filenames[asset]
+
+        # Only split off the first line instead of splitting the whole (potentially long) error message
+        first_error_line = error.split("\n", 1)[0].rstrip("\r")
+        change_user = changes_by_file.get(asset_filename)
+
+        if change_user:
+            username = change_user[1]
+            p4_user_info = get_p4_user_map().get(username)
+            if p4_user_info:
+                change_source_str = f"{username} @{change_user[0]}" if change_user else "unknown @?"
+                output_lines.append(
+                    f"{RED}ERROR: {asset_filename} by {change_source_str}:\n       {first_error_line}{RESET}\n")
+
+                continue
+        failed_to_find_user_assets.append(asset_filename)
+
+    if len(failed_to_find_user_assets) > 0:
         failed_to_find_asset_list = '\n'.join(failed_to_find_user_assets)
         failed_to_find_error = f"Failed to find users for {len(failed_to_find_user_assets)} assets with errors:\n{failed_to_find_asset_list}"
-        print(f"{RED}ERROR: }{failed_to_find_error}")
+        output_lines.append(f"{RED}ERROR: {failed_to_find_error}{RESET}\n")
+    sys.stdout.write("".join(output_lines))
+    return len(report), len(failed_to_find_user_assets)
 
 
 p4 = UnrealPerforce()
-p4_user_map = p4.get_user_map()
+# Users rarely change, so they may be reused from previous runs
+p4_meta_cache_age = datetime.timedelta(hours=1)
 ue = UnrealEngine.create_from_parent_tree(os.getcwd())
 
 if not ue.environment.has_open_unreal_utilities():
@@ -99,6 +147,13 @@ content_dir_local_path = os.path.join(
     ue.environment.project_root, "Content")
 content_dir_depot_location = p4.get_depot_location(content_dir_local_path)
 
-generate_assets_list()
+# The asset list is generated before the build (instead of in parallel),
+# so the build and validation can be skipped entirely if there is nothing to validate.
+if len(generate_assets_list()) == 0:
+    print("No uasset changes -> skipping build and validation")
+    sys.exit(0)
+build_editor()
 run_validation()
-print_issues()
+num_errors, _ = print_issues()
+# Non-zero exit code, so CI jobs fail (and skip subsequent steps) if there are validation errors
+sys.exit(1 if num_errors > 0 else 0)
@@ -4,7 +4,42 @@ Must not have any dependencies on other modules!
 """
 
 import argparse
-import shutil
+import os
+import zipfile
+
+# Files that are already compressed (or don't compress well).
+# These are stored without compression, so we don't waste time deflating them for (almost) no size benefit.
+STORED_EXTENSIONS = {
+    ".pak", ".ucas", ".utoc", ".ubulk", ".uexp",
+    ".png", ".jpg", ".jpeg", ".ogg", ".mp4", ".bk2",
+    ".zip", ".7z"
+}
+
+
+def get_compress_type(file_path: str) -> int:
+    extension = os.path.splitext(file_path)[1].lower()
+    return zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def pack(dir: str, archive: str) -> None:
+    # Write files while walking the tree instead of collecting them first (like shutil.make_archive).
+    # Fastest compression level, because most of the data we archive (cooked/compiled files) doesn't compress well anyways.
+    with zipfile.ZipFile(archive + ".zip", "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+        for root, dirs, files in os.walk(dir):
+            # Directory entries are written as well, so empty directories are preserved (same as shutil.make_archive)
+            for name in dirs:
+                dir_path = os.path.join(root, name)
+                zip_file.write(dir_path, arcname=os.path.relpath(dir_path, dir))
+            for name in files:
+                file_path = os.path.join(root, name)
+                zip_file.write(file_path, arcname=os.path.relpath(file_path, dir),
+                               compress_type=get_compress_type(file_path))
+
+
+def unpack(dir: str, archive: str) -> None:
+    with zipfile.ZipFile(archive) as zip_file:
+        zip_file.extractall(dir)
+
 
 if __name__ == "__main__":
     argparser = argparse.ArgumentParser()
@@ -13,8 +48,8 @@ if __name__ == "__main__":
     argparser.add_argument("archive", help="Path to the zip file (excluding '.zip' extension).")
     args = argparser.parse_args()
     if args.mode == "unpack":
-        shutil.unpack_archive(filename=args.archive, extract_dir=args.dir, format="zip")
+        unpack(dir=args.dir, archive=args.archive)
     elif args.mode == "pack":
-        shutil.make_archive(base_name=args.archive, format="zip", root_dir=args.dir)
+        pack(dir=args.dir, archive=args.archive)
     else:
         raise argparse.ArgumentError("Invalid argument value for parameter 'mode'. Only valid options are 'unpack' and 'pack'.")